@@ -2,6 +2,121 @@ import pandas as pd
 import pg8000
 import logging
 
+METRICS = ['temp_avg', 'temp_diff', 'autocorr', 'max_temp', 'min_temp']
+
+ROLLUP_TABLES = {
+    'month': 'weather_data_monthly',
+    'year': 'weather_data_yearly',
+}
+
+AGGREGATES = ['count', 'sum', 'min', 'max', 'sumsq']
+
+
+def aggregate_columns():
+    """
+    Возвращает имена колонок агрегатов rollup-таблиц в фиксированном порядке.
+
+    :return: Список имен колонок вида '<метрика>_<агрегат>'.
+    """
+    return [f'{metric}_{aggregate}' for metric in METRICS for aggregate in AGGREGATES]
+
+
+def aggregate_expressions():
+    """
+    Возвращает SQL-выражения для вычисления агрегатов по сырым данным.
+    Порядок совпадает с aggregate_columns(). Значения NaN считаются пропусками.
+
+    :return: Список SQL-выражений.
+    """
+    expressions = []
+    for metric in METRICS:
+        value = f"NULLIF({metric}, 'NaN')"
+        expressions += [
+            f'COUNT({value})',
+            f'SUM({value})',
+            f'MIN({value})',
+            f'MAX({value})',
+            f'SUM({value} * {value})',
+        ]
+    return expressions
+
+
+def split_period(start_date, end_date):
+    """
+    Разбивает период на неполные крайние отрезки, полные годы и полные месяцы.
+
+    Границы отрезков полуоткрытые: [начало, конец).
+
+    :param start_date: Начальная дата периода (включительно).
+    :param end_date: Конечная дата периода (включительно).
+    :return: Словарь с ключами 'raw', 'month' и 'year', содержащий списки пар (начало, конец).
+    """
+    start = pd.Timestamp(start_date).normalize()
+    end = pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1)
+    result = {'raw': [], 'month': [], 'year': []}
+    if start >= end:
+        return result
+
+    first_month = start if start.day == 1 else start + pd.offsets.MonthBegin(1)
+    last_month = end if end.day == 1 else end - pd.offsets.MonthBegin(1)
+    if first_month >= last_month:
+        result['raw'].append((start, end))
+        return result
+
+    if start < first_month:
+        result['raw'].append((start, first_month))
+    if last_month < end:
+        result['raw'].append((last_month, end))
+
+    first_year = first_month if first_month.month == 1 else first_month + pd.offsets.YearBegin(1)
+    last_year = last_month if last_month.month == 1 else last_month - pd.offsets.YearBegin(1)
+    if first_year < last_year:
+        result['year'].append((first_year, last_year))
+        if first_month < first_year:
+            result['month'].append((first_month, first_year))
+        if last_year < last_month:
+            result['month'].append((last_year, last_month))
+    else:
+        result['month'].append((first_month, last_month))
+    return result
+
+
+def combine_aggregates(rows):
+    """
+    Объединяет частичные агрегаты и вычисляет итоговую статистику по каждой метрике.
+
+    :param rows: Последовательность строк, упорядоченных как aggregate_columns().
+    :return: DataFrame с колонками count, sum, min, max, mean, std, индексированный по метрикам.
+    """
+    result = []
+    for position, metric in enumerate(METRICS):
+        offset = position * len(AGGREGATES)
+        count, total, minimum, maximum, sumsq = 0, 0.0, None, None, 0.0
+        for row in rows:
+            row_count, row_sum, row_min, row_max, row_sumsq = row[offset:offset + len(AGGREGATES)]
+            if not row_count:
+                continue
+            count += int(row_count)
+            total += float(row_sum)
+            sumsq += float(row_sumsq)
+            minimum = row_min if minimum is None else min(minimum, row_min)
+            maximum = row_max if maximum is None else max(maximum, row_max)
+        mean = total / count if count else None
+        std = None
+        if count > 1:
+            std = (max(sumsq - total * total / count, 0.0) / (count - 1)) ** 0.5
+        result.append({
+            'metric': metric,
+            'count': count,
+            'sum': total if count else None,
+            'min': minimum,
+            'max': maximum,
+            'mean': mean,
+            'std': std,
+        })
+    return pd.DataFrame(result).set_index('metric')
+
+
 class WeatherDatabaseManager:
     """
     Класс для взаимодействия с базой данных PostgreSQL для хранения и получения погодных данных.
@@ -33,7 +148,7 @@ class WeatherDatabaseManager:
 
     def create_table(self):
         """
-        Создает таблицу для хранения погодных данных, если она не существует.
+        Создает таблицу для хранения погодных данных и индекс по станции и времени, если они не существуют.
         """
         query = """
         CREATE TABLE IF NOT EXISTS weather_data (
@@ -50,20 +165,62 @@ class WeatherDatabaseManager:
         try:
             with self.connection.cursor() as cursor:
                 cursor.execute(query)
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS weather_data_station_timestamp_idx "
+                    "ON weather_data (station_id, timestamp)"
+                )
                 self.connection.commit()
                 self.logger.info("Таблица weather_data успешно создана (или уже существует).")
         except Exception as e:
             self.logger.error(f"Ошибка при создании таблицы: {e}")
+        self.create_rollup_tables()
+
+    def create_rollup_tables(self):
+        """
+        Создает таблицы помесячных и погодовых агрегатов, если они не существуют.
+        Для каждой метрики хранятся количество, сумма, минимум, максимум и сумма квадратов.
+        Только что созданные таблицы заполняются по уже имеющимся в weather_data записям.
+        """
+        columns = ',\n'.join(
+            f'{column} BIGINT NOT NULL DEFAULT 0' if column.endswith('_count') else f'{column} FLOAT'
+            for column in aggregate_columns()
+        )
+        try:
+            with self.connection.cursor() as cursor:
+                created = []
+                for table in ROLLUP_TABLES.values():
+                    cursor.execute("SELECT to_regclass(%s)", (table,))
+                    if cursor.fetchone()[0] is None:
+                        created.append(table)
+                    cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        station_id VARCHAR(50),
+                        period_start DATE,
+                        {columns},
+                        PRIMARY KEY (station_id, period_start)
+                    );
+                    """)
+                if created:
+                    cursor.execute("SELECT MIN(timestamp), MAX(timestamp) FROM weather_data")
+                    start_date, end_date = cursor.fetchone()
+                    if start_date is not None:
+                        self._rebuild_rollups(cursor, start_date, end_date)
+                self.connection.commit()
+                self.logger.info("Таблицы агрегатов успешно созданы (или уже существуют).")
+        except Exception as e:
+            self.logger.error(f"Ошибка при создании таблиц агрегатов: {e}")
 
     def insert_data(self, data):
         """
         Вставляет данные анализа в таблицу weather_data.
         Проверяет наличие дубликатов перед вставкой.
+        Таблицы агрегатов обновляются вставленными записями в той же транзакции.
 
         :param data: Список словарей с данными анализа.
         """
         try:
             with self.connection.cursor() as cursor:
+                inserted_ids = []
                 for entry in data:
                     # Проверка существования записи
                     cursor.execute(
@@ -76,6 +233,7 @@ class WeatherDatabaseManager:
                             """
                             INSERT INTO weather_data (station_id, timestamp, temp_avg, temp_diff, autocorr, max_temp, min_temp)
                             VALUES (%s, %s, %s, %s, %s, %s, %s)
+                            RETURNING id
                             """,
                             (
                                 entry['station_id'],
@@ -87,11 +245,129 @@ class WeatherDatabaseManager:
                                 entry['min_temp']
                             )
                         )
+                        inserted_ids.append(cursor.fetchone()[0])
+                if inserted_ids:
+                    self.update_rollups(cursor, inserted_ids)
                 self.connection.commit()
                 self.logger.info("Данные успешно вставлены в таблицу weather_data.")
         except Exception as e:
             self.logger.error(f"Ошибка при вставке данных: {e}")
 
+    def update_rollups(self, cursor, ids):
+        """
+        Добавляет записи weather_data с указанными идентификаторами в таблицы агрегатов.
+
+        :param cursor: Курсор открытой транзакции.
+        :param ids: Список идентификаторов вставленных записей.
+        """
+        for period, table in ROLLUP_TABLES.items():
+            cursor.execute(
+                self._rollup_insert_query(period, table, "id = ANY(%s)", merge=True),
+                (list(ids),)
+            )
+
+    def rebuild_rollups(self, start_date, end_date, station_id=None):
+        """
+        Пересчитывает таблицы агрегатов по сырым данным за период.
+        Период расширяется до границ затронутых месяцев и лет.
+
+        :param start_date: Начальная дата периода (формат YYYY-MM-DD).
+        :param end_date: Конечная дата периода (формат YYYY-MM-DD).
+        :param station_id: Идентификатор станции. По умолчанию пересчитываются все станции.
+        """
+        try:
+            with self.connection.cursor() as cursor:
+                self._rebuild_rollups(cursor, start_date, end_date, station_id)
+                self.connection.commit()
+                self.logger.info(f"Агрегаты за период {start_date} - {end_date} успешно пересчитаны.")
+        except Exception as e:
+            self.logger.error(f"Ошибка при пересчете агрегатов за период {start_date} - {end_date}: {e}")
+
+    def _rebuild_rollups(self, cursor, start_date, end_date, station_id=None):
+        for period, table in ROLLUP_TABLES.items():
+            frequency = 'M' if period == 'month' else 'Y'
+            lower = pd.Timestamp(start_date).to_period(frequency).start_time
+            upper = (pd.Timestamp(end_date).to_period(frequency) + 1).start_time
+            station_filter = " AND station_id = %s" if station_id is not None else ""
+            params = (lower.date(), upper.date()) + ((station_id,) if station_id is not None else ())
+            cursor.execute(
+                f"DELETE FROM {table} WHERE period_start >= %s AND period_start < %s{station_filter}",
+                params
+            )
+            params = (lower.to_pydatetime(), upper.to_pydatetime()) + params[2:]
+            cursor.execute(
+                self._rollup_insert_query(period, table, f"timestamp >= %s AND timestamp < %s{station_filter}"),
+                params
+            )
+
+    @staticmethod
+    def _rollup_insert_query(period, table, condition, merge=False):
+        columns = aggregate_columns()
+        query = f"""
+        INSERT INTO {table} AS rollup (station_id, period_start, {', '.join(columns)})
+        SELECT station_id, DATE_TRUNC('{period}', timestamp)::date, {', '.join(aggregate_expressions())}
+        FROM weather_data
+        WHERE {condition} AND station_id IS NOT NULL AND timestamp IS NOT NULL
+        GROUP BY 1, 2
+        """
+        if not merge:
+            return query
+        updates = []
+        for column in columns:
+            if column.endswith('_min'):
+                value = f"LEAST(rollup.{column}, EXCLUDED.{column})"
+            elif column.endswith('_max'):
+                value = f"GREATEST(rollup.{column}, EXCLUDED.{column})"
+            elif column.endswith('_count'):
+                value = f"rollup.{column} + EXCLUDED.{column}"
+            else:
+                value = f"COALESCE(rollup.{column}, 0) + COALESCE(EXCLUDED.{column}, 0)"
+            updates.append(f"{column} = {value}")
+        return query + f"ON CONFLICT (station_id, period_start) DO UPDATE SET {', '.join(updates)}"
+
+    def query_aggregates(self, station_id, start_date, end_date):
+        """
+        Вычисляет агрегаты метрик станции за период.
+        Полные годы и месяцы берутся из таблиц агрегатов, к сырым данным
+        обращаются только неполные крайние месяцы.
+
+        :param station_id: Идентификатор станции.
+        :param start_date: Начальная дата периода (формат YYYY-MM-DD).
+        :param end_date: Конечная дата периода (формат YYYY-MM-DD).
+        :return: DataFrame с колонками count, sum, min, max, mean, std, индексированный по метрикам.
+        """
+        rollup_expressions = []
+        for column in aggregate_columns():
+            aggregate = column.rsplit('_', 1)[1]
+            if aggregate == 'count':
+                rollup_expressions.append(f"SUM({column})::bigint")
+            else:
+                function = {'min': 'MIN', 'max': 'MAX'}.get(aggregate, 'SUM')
+                rollup_expressions.append(f"{function}({column})")
+        try:
+            rows = []
+            with self.connection.cursor() as cursor:
+                for period, segments in split_period(start_date, end_date).items():
+                    for lower, upper in segments:
+                        if period == 'raw':
+                            cursor.execute(
+                                f"SELECT {', '.join(aggregate_expressions())} FROM weather_data "
+                                "WHERE station_id = %s AND timestamp >= %s AND timestamp < %s",
+                                (station_id, lower.to_pydatetime(), upper.to_pydatetime())
+                            )
+                        else:
+                            cursor.execute(
+                                f"SELECT {', '.join(rollup_expressions)} FROM {ROLLUP_TABLES[period]} "
+                                "WHERE station_id = %s AND period_start >= %s AND period_start < %s",
+                                (station_id, lower.date(), upper.date())
+                            )
+                        rows.extend(cursor.fetchall())
+            self.logger.info("Агрегаты успешно извлечены.")
+            return combine_aggregates(rows)
+        except Exception as e:
+            self.logger.error(f"Ошибка при извлечении агрегатов: {e}")
+            return pd.DataFrame()
+
 
     def fetch_data(self, station_id):
         """
@@ -122,6 +398,8 @@ class WeatherDatabaseManager:
         try:
             with self.connection.cursor() as cursor:
                 cursor.execute(query, (station_id,))
+                for table in ROLLUP_TABLES.values():
+                    cursor.execute(f"DELETE FROM {table} WHERE station_id = %s", (station_id,))
                 self.connection.commit()
                 self.logger.info("Данные успешно удалены из таблицы weather_data.")
         except Exception as e:
@@ -139,6 +417,7 @@ class WeatherDatabaseManager:
         try:
             with self.connection.cursor() as cursor:
                 cursor.execute(query, (station_id, start_date, end_date))
+                self._rebuild_rollups(cursor, start_date, end_date, station_id)
                 self.connection.commit()
                 self.logger.info(
                     f"Данные для station_id={station_id} за период {start_date} - {end_date} успешно удалены.")
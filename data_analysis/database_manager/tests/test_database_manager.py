@@ -0,0 +1,216 @@
+import unittest
+import uuid
+from decimal import Decimal
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+from data_analysis.database_manager import WeatherDatabaseManager
+import os
+os.environ['TESTING'] = 'True'
+
+
+def make_row(count, total, minimum, maximum, sumsq):
+    return (count, total, minimum, maximum, sumsq) * 5
+
+
+class TestWeatherDatabaseManager(unittest.TestCase):
+
+    @patch('pg8000.connect')
+    def setUp(self, mock_connect):
+        self.cursor = MagicMock()
+        mock_connect.return_value.cursor.return_value.__enter__.return_value = self.cursor
+        self.manager = WeatherDatabaseManager('weather', 'user', 'password')
+
+    def executed_tables(self):
+        tables = []
+        for call in self.cursor.execute.call_args_list:
+            query = call.args[0]
+            for table in ['weather_data_yearly', 'weather_data_monthly', 'weather_data ']:
+                if table in query:
+                    tables.append((table.strip(), call.args[1][1:]))
+                    break
+        return tables
+
+    def test_query_aggregates_uses_rollups_for_full_periods(self):
+        self.cursor.fetchall.return_value = [make_row(0, None, None, None, None)]
+        self.manager.query_aggregates('12345', '2020-11-15', '2023-02-10')
+        tables = self.executed_tables()
+        self.assertEqual(len(tables), 5)
+        self.assertEqual(sum(table == 'weather_data' for table, _ in tables), 2)
+        self.assertEqual(sum(table == 'weather_data_monthly' for table, _ in tables), 2)
+        yearly = [params for table, params in tables if table == 'weather_data_yearly']
+        self.assertEqual([str(value) for value in yearly[0]], ['2021-01-01', '2023-01-01'])
+
+    def test_query_aggregates_within_month_uses_raw_table(self):
+        self.cursor.fetchall.return_value = [make_row(0, None, None, None, None)]
+        self.manager.query_aggregates('12345', '2023-01-05', '2023-01-20')
+        self.assertEqual([table for table, _ in self.executed_tables()], ['weather_data'])
+
+    def test_query_aggregates_combines_partial_results(self):
+        self.cursor.fetchall.side_effect = [
+            [make_row(2, 3.0, 1.0, 2.0, 5.0)],
+            [make_row(0, None, None, None, None)],
+            [make_row(1, 3.0, 3.0, 3.0, 9.0)],
+        ]
+        result = self.manager.query_aggregates('12345', '2023-01-15', '2023-03-10')
+        self.assertEqual(result.loc['temp_avg', 'count'], 3)
+        self.assertEqual(result.loc['temp_avg', 'min'], 1.0)
+        self.assertEqual(result.loc['temp_avg', 'max'], 3.0)
+        self.assertAlmostEqual(result.loc['temp_avg', 'mean'], 2.0)
+        self.assertAlmostEqual(result.loc['temp_avg', 'std'], 1.0)
+
+    def test_query_aggregates_accepts_decimal_counts(self):
+        self.cursor.fetchall.side_effect = [
+            [make_row(Decimal(2), 3.0, 1.0, 2.0, 5.0)],
+            [make_row(Decimal(1), 3.0, 3.0, 3.0, 9.0)],
+        ]
+        result = self.manager.query_aggregates('12345', '2022-11-01', '2023-12-31')
+        self.assertEqual(result.loc['temp_avg', 'count'], 3)
+        self.assertAlmostEqual(result.loc['temp_avg', 'mean'], 2.0)
+        rollup_queries = [call.args[0] for call in self.cursor.execute.call_args_list
+                          if 'weather_data_monthly' in call.args[0]]
+        self.assertIn('SUM(temp_avg_count)::bigint', rollup_queries[0])
+
+    def test_aggregates_ignore_nan(self):
+        self.cursor.fetchall.return_value = [make_row(0, None, None, None, None)]
+        self.manager.query_aggregates('12345', '2023-01-05', '2023-01-20')
+        query = self.cursor.execute.call_args.args[0]
+        self.assertIn("MAX(NULLIF(max_temp, 'NaN'))", query)
+        self.assertNotIn('MAX(max_temp)', query)
+
+    def test_insert_data_updates_rollups(self):
+        self.cursor.fetchone.side_effect = [None, (1,)]
+        self.manager.insert_data([{
+            'station_id': '12345', 'timestamp': '2023-01-01', 'temp_avg': 1.0, 'temp_diff': None,
+            'autocorr': None, 'max_temp': None, 'min_temp': None
+        }])
+        queries = [call.args[0] for call in self.cursor.execute.call_args_list]
+        for table in ['weather_data_monthly', 'weather_data_yearly']:
+            query = next(query for query in queries if f'INSERT INTO {table}' in query)
+            self.assertIn('temp_avg_count = rollup.temp_avg_count + EXCLUDED.temp_avg_count', query)
+            self.assertIn('temp_avg_sum = COALESCE(rollup.temp_avg_sum, 0) + COALESCE(EXCLUDED.temp_avg_sum, 0)',
+                          query)
+            self.assertIn('temp_avg_min = LEAST(rollup.temp_avg_min, EXCLUDED.temp_avg_min)', query)
+            self.assertIn('temp_avg_max = GREATEST(rollup.temp_avg_max, EXCLUDED.temp_avg_max)', query)
+            self.assertIn('station_id IS NOT NULL AND timestamp IS NOT NULL', query)
+        self.assertEqual(self.manager.connection.commit.call_count, 1)
+
+    def test_create_table_adds_station_timestamp_index(self):
+        self.cursor.fetchone.return_value = ('exists',)
+        self.manager.create_table()
+        queries = [call.args[0] for call in self.cursor.execute.call_args_list]
+        self.assertTrue(any('CREATE INDEX IF NOT EXISTS' in query and 'ON weather_data (station_id, timestamp)' in query
+                            for query in queries))
+
+    def assert_rollups_rebuilt(self, station_id, monthly_bounds, yearly_bounds):
+        calls = self.cursor.execute.call_args_list
+        for table, bounds in [('weather_data_monthly', monthly_bounds), ('weather_data_yearly', yearly_bounds)]:
+            delete = next(call for call in calls if call.args[0].startswith(f'DELETE FROM {table}'))
+            self.assertEqual([str(value) for value in delete.args[1][:2]], list(bounds))
+            self.assertEqual(delete.args[1][2:], (station_id,) if station_id is not None else ())
+            insert = next(call for call in calls if f'INSERT INTO {table}' in call.args[0])
+            self.assertEqual([value.date().isoformat() for value in insert.args[1][:2]], list(bounds))
+            self.assertNotIn('ON CONFLICT', insert.args[0])
+
+    def test_rebuild_rollups_widens_to_whole_periods(self):
+        self.manager.rebuild_rollups('2023-03-15', '2024-02-10', station_id='12345')
+        self.assert_rollups_rebuilt('12345', ('2023-03-01', '2024-03-01'), ('2023-01-01', '2025-01-01'))
+        self.manager.connection.commit.assert_called_once()
+
+    def test_delete_data_by_period_rebuilds_rollups(self):
+        self.manager.delete_data_by_period('12345', '2023-05-10', '2023-05-20')
+        self.assertTrue(self.cursor.execute.call_args_list[0].args[0].startswith('DELETE FROM weather_data '))
+        self.assert_rollups_rebuilt('12345', ('2023-05-01', '2023-06-01'), ('2023-01-01', '2024-01-01'))
+
+    def test_delete_data_clears_rollups(self):
+        self.manager.delete_data('12345')
+        queries = [(call.args[0], call.args[1]) for call in self.cursor.execute.call_args_list]
+        for table in ['weather_data_monthly', 'weather_data_yearly']:
+            self.assertIn((f'DELETE FROM {table} WHERE station_id = %s', ('12345',)), queries)
+
+    def test_create_rollup_tables_backfills_new_tables(self):
+        self.cursor.fetchone.side_effect = [(None,), (None,), (datetime(2022, 6, 3), datetime(2023, 2, 1))]
+        self.manager.create_rollup_tables()
+        self.assert_rollups_rebuilt(None, ('2022-06-01', '2023-03-01'), ('2022-01-01', '2024-01-01'))
+
+    def test_create_rollup_tables_skips_backfill_for_existing_tables(self):
+        self.cursor.fetchone.side_effect = [('weather_data_monthly',), ('weather_data_yearly',)]
+        self.manager.create_rollup_tables()
+        queries = [call.args[0] for call in self.cursor.execute.call_args_list]
+        self.assertFalse(any('INSERT INTO' in query for query in queries))
+
+
+
+@unittest.skipUnless(os.getenv('WEATHER_TEST_DB_NAME'), 'WEATHER_TEST_DB_NAME is not set')
+class TestWeatherDatabaseManagerPostgres(unittest.TestCase):
+    """
+    Проверки на реальной базе PostgreSQL. Параметры подключения берутся из переменных окружения
+    WEATHER_TEST_DB_NAME, WEATHER_TEST_DB_USER, WEATHER_TEST_DB_PASSWORD, WEATHER_TEST_DB_HOST
+    и WEATHER_TEST_DB_PORT. Таблицы создаются во временной схеме, которая удаляется после теста.
+    """
+
+    def setUp(self):
+        self.manager = WeatherDatabaseManager(
+            os.environ['WEATHER_TEST_DB_NAME'],
+            os.getenv('WEATHER_TEST_DB_USER', 'postgres'),
+            os.getenv('WEATHER_TEST_DB_PASSWORD', ''),
+            host=os.getenv('WEATHER_TEST_DB_HOST', 'localhost'),
+            port=int(os.getenv('WEATHER_TEST_DB_PORT', '5432'))
+        )
+        self.schema = f'test_{uuid.uuid4().hex}'
+        with self.manager.connection.cursor() as cursor:
+            cursor.execute(f'CREATE SCHEMA {self.schema}')
+            cursor.execute(f'SET search_path TO {self.schema}')
+        self.manager.connection.commit()
+
+    def tearDown(self):
+        with self.manager.connection.cursor() as cursor:
+            cursor.execute(f'DROP SCHEMA {self.schema} CASCADE')
+        self.manager.connection.commit()
+        self.manager.close_connection()
+
+    def insert(self, *rows):
+        self.manager.insert_data([{
+            'station_id': station_id, 'timestamp': timestamp, 'temp_avg': temp_avg, 'temp_diff': None,
+            'autocorr': None, 'max_temp': float('nan'), 'min_temp': None
+        } for station_id, timestamp, temp_avg in rows])
+
+    def test_rollups_match_raw_data(self):
+        self.manager.create_table()
+        self.insert(('A', datetime(2022, 12, 20), 1.0), ('A', datetime(2023, 1, 5), 2.0))
+        self.insert(('A', datetime(2023, 1, 20), 4.0), ('A', datetime(2023, 3, 2), 6.0),
+                    ('A', None, 100.0))
+
+        result = self.manager.query_aggregates('A', '2022-12-10', '2023-12-31')
+        self.assertEqual(result.loc['temp_avg', 'count'], 4)
+        self.assertAlmostEqual(result.loc['temp_avg', 'mean'], 3.25)
+        self.assertEqual(result.loc['temp_avg', 'min'], 1.0)
+        self.assertEqual(result.loc['temp_avg', 'max'], 6.0)
+        self.assertEqual(result.loc['max_temp', 'count'], 0)
+
+        self.manager.delete_data_by_period('A', '2023-01-01', '2023-01-10')
+        result = self.manager.query_aggregates('A', '2023-01-01', '2023-12-31')
+        self.assertEqual(result.loc['temp_avg', 'count'], 2)
+        self.assertAlmostEqual(result.loc['temp_avg', 'sum'], 10.0)
+
+    def test_create_table_backfills_existing_rows(self):
+        with self.manager.connection.cursor() as cursor:
+            cursor.execute("""
+            CREATE TABLE weather_data (
+                id SERIAL PRIMARY KEY, station_id VARCHAR(50), timestamp TIMESTAMP, temp_avg FLOAT,
+                temp_diff FLOAT, autocorr FLOAT, max_temp FLOAT, min_temp FLOAT
+            )
+            """)
+            cursor.execute(
+                "INSERT INTO weather_data (station_id, timestamp, temp_avg) VALUES (%s, %s, %s), (%s, %s, %s)",
+                ('A', datetime(2021, 5, 1), 1.0, 'A', datetime(2021, 7, 1), 3.0)
+            )
+        self.manager.connection.commit()
+
+        self.manager.create_table()
+        result = self.manager.query_aggregates('A', '2021-01-01', '2021-12-31')
+        self.assertEqual(result.loc['temp_avg', 'count'], 2)
+        self.assertAlmostEqual(result.loc['temp_avg', 'mean'], 2.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,10 @@
+import glob
+import tempfile
 import unittest
+from unittest.mock import patch
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
 from data_analysis.weather_analysis import WeatherDataProcessor
 import os
 os.environ['TESTING'] = 'True'
@@ -33,6 +38,93 @@ class TestWeatherDataProcessor(unittest.TestCase):
         self.assertIn('max', result.columns)
         self.assertIn('min', result.columns)
 
+    def test_export_csv_partitions_and_append(self):
+        processor = WeatherDataProcessor(pd.DataFrame({
+            'time': ['2022-12-31', '2023-01-01', '2023-01-02'],
+            'tavg': [1.0, 2.0, 3.0]
+        }))
+        with tempfile.TemporaryDirectory() as directory:
+            paths = processor.export('12345', directory=directory, fmt='csv', compression='gzip')
+            self.assertEqual(len(paths), 2)
+            self.assertTrue(all(path.endswith('.csv.gz') for path in paths))
+
+            processor.export('12345', directory=directory, fmt='csv', compression='gzip')
+            files = glob.glob(f'{directory}/station_id=12345/year=2023/*')
+            self.assertEqual(len(files), 2)
+            result = pd.concat(pd.read_csv(path) for path in files)
+            self.assertEqual(len(result), 4)
+            self.assertNotIn('station_id', result.columns)
+
+            processor.export('12345', directory=directory, fmt='csv', append=False)
+            self.assertEqual(len(glob.glob(f'{directory}/station_id=12345/year=2023/*')), 1)
+
+    def test_export_parquet(self):
+        partitioning = ds.partitioning(pa.schema([('station_id', pa.string()), ('year', pa.int32())]),
+                                       flavor='hive')
+        with tempfile.TemporaryDirectory() as directory:
+            self.processor.export('01234', directory=directory)
+            result = pd.read_parquet(directory, partitioning=partitioning)
+            self.assertEqual(len(result), 9)
+            self.assertListEqual(result['tavg'].tolist(), self.processor.df['tavg'].tolist())
+            self.assertTrue((result['station_id'] == '01234').all())
+
+    def test_export_rejects_missing_time(self):
+        processor = WeatherDataProcessor(pd.DataFrame({
+            'time': ['2023-01-01', None, '2023-01-03'],
+            'tavg': [1.0, 2.0, 3.0]
+        }))
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(ValueError):
+                processor.export('1', directory=directory, fmt='csv')
+            self.assertListEqual(os.listdir(directory), [])
+
+    def test_export_multi_station_frame(self):
+        processor = WeatherDataProcessor(pd.DataFrame({
+            'station_id': ['A', 'B', 'A'],
+            'time': ['2023-01-01', '2023-01-01', '2024-01-01'],
+            'tavg': [1.0, 2.0, 3.0]
+        }))
+        with tempfile.TemporaryDirectory() as directory:
+            processor.export(directory=directory, fmt='csv')
+            partitions = sorted(path[len(directory) + 1:] for path in glob.glob(f'{directory}/*/*'))
+            self.assertListEqual(partitions, ['station_id=A/year=2023', 'station_id=A/year=2024',
+                                              'station_id=B/year=2023'])
+
+    def test_export_failed_overwrite_keeps_data(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.processor.export('12345', directory=directory)
+            with patch.object(pd.DataFrame, 'to_parquet', side_effect=OSError('disk full')):
+                with self.assertRaises(OSError):
+                    self.processor.export('12345', directory=directory, append=False)
+            self.assertEqual(len(glob.glob(f'{directory}/*/*/part-*')), 1)
+            self.assertEqual(len(pd.read_parquet(directory)), 9)
+
+    def test_export_unsupported_compression(self):
+        for fmt, compression in [('parquet', 'bogus'), ('feather', 'gzip'), ('csv', 'snappy')]:
+            with tempfile.TemporaryDirectory() as directory:
+                with self.assertRaises(ValueError):
+                    self.processor.export('12345', directory=directory, fmt=fmt, compression=compression)
+                self.assertListEqual(os.listdir(directory), [])
+
+    def test_export_feather_without_compression(self):
+        processor = WeatherDataProcessor(pd.DataFrame({
+            'time': pd.date_range('2023-01-01', periods=365),
+            'tavg': [1.0] * 365
+        }))
+        with tempfile.TemporaryDirectory() as directory:
+            plain, = processor.export('12345', directory=directory, fmt='feather', compression=None)
+            compressed, = processor.export('12345', directory=directory, fmt='feather', compression='lz4')
+            self.assertGreater(os.path.getsize(plain), os.path.getsize(compressed))
+            self.assertEqual(len(pd.read_feather(plain)), 365)
+
+    def test_export_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            self.processor.export('12345', fmt='json')
+
+    def test_export_requires_station_id(self):
+        with self.assertRaises(ValueError):
+            self.processor.export()
+
 if __name__ == '__main__':
 
     unittest.main()
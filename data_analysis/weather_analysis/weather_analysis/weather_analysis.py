@@ -1,13 +1,75 @@
 import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas as pd
 import time
 
+EXPORT_FORMATS = {
+    'parquet': '.parquet',
+    'feather': '.feather',
+    'csv': '.csv',
+}
+
+CSV_COMPRESSION_SUFFIXES = {
+    None: '',
+    'gzip': '.gz',
+    'bz2': '.bz2',
+    'zip': '.zip',
+    'xz': '.xz',
+    'zstd': '.zst',
+}
+
+EXPORT_COMPRESSIONS = {
+    'parquet': {None, 'snappy', 'gzip', 'brotli', 'lz4', 'zstd'},
+    'feather': {None, 'uncompressed', 'lz4', 'zstd'},
+    'csv': set(CSV_COMPRESSION_SUFFIXES),
+}
+
+EXCEL_MAX_ROWS = 1048576
+
 def generate_autocorr(data, column):
     for lag in range(-1, len(data) - 1):
         yield data[column].autocorr(lag=lag)
 
 
+def write_partition(frame, directory, fmt, compression=None, chunksize=None, append=True):
+    """
+    Записывает одну партицию данных в отдельный файл внутри каталога партиции.
+
+    :param frame: DataFrame с данными партиции.
+    :param directory: Каталог партиции.
+    :param fmt: Формат файла ('parquet', 'feather' или 'csv').
+    :param compression: Алгоритм сжатия.
+    :param chunksize: Размер блока строк при записи CSV.
+    :param append: Если False, остальные файлы партиции удаляются после успешной записи.
+    :return: Путь к записанному файлу.
+    """
+    os.makedirs(directory, exist_ok=True)
+    suffix = EXPORT_FORMATS[fmt]
+    if fmt == 'csv':
+        suffix += CSV_COMPRESSION_SUFFIXES.get(compression, '')
+    name = f'part-{uuid.uuid4().hex}{suffix}'
+    path = os.path.join(directory, name)
+    frame = frame.reset_index(drop=True)
+    try:
+        if fmt == 'parquet':
+            frame.to_parquet(path, index=False, compression=compression)
+        elif fmt == 'feather':
+            frame.to_feather(path, compression=compression)
+        else:
+            frame.to_csv(path, index=False, compression=compression, chunksize=chunksize)
+    except Exception:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    if not append:
+        for existing in os.listdir(directory):
+            if existing.startswith('part-') and existing != name:
+                os.remove(os.path.join(directory, existing))
+    return path
+
+
 def time_execution(func):
     """
     Декоратор для измерения времени выполнения функции.
@@ -134,13 +196,73 @@ class WeatherDataProcessor:
         self.db_manager.insert_data(records)
 
     @time_execution
-    def save_to_excel(self, filename: str = 'weather_analysis.xlsx'):
+    def export(self, station_id: str = None, directory: str = 'results/weather_analysis', fmt: str = 'parquet',
+               compression='default', chunksize: int = 100000, append: bool = True, max_workers: int = None) -> list:
+        """
+        Экспортирует текущий DataFrame в колоночный набор данных, разбитый по станции и году.
+
+        Файлы раскладываются по каталогам вида
+        ``<directory>/station_id=<id>/year=<год>/part-<uuid>.<ext>``, партиции пишутся параллельно.
+        Идентификатор станции хранится только в имени каталога партиции.
+        Повторный вызов с append=True добавляет новые файлы в существующий набор данных.
+
+        :param station_id: Идентификатор станции. Обязателен, если в DataFrame нет колонки 'station_id'.
+        :param directory: Корневой каталог набора данных. По умолчанию 'results/weather_analysis'.
+        :param fmt: Формат файлов: 'parquet', 'feather' или 'csv'. По умолчанию 'parquet'.
+        :param compression: Алгоритм сжатия. По умолчанию 'snappy' для parquet, 'lz4' для feather
+            и без сжатия для csv. None отключает сжатие для любого формата.
+        :param chunksize: Размер блока строк при записи CSV. По умолчанию 100000.
+        :param append: Если False, существующие файлы затронутых партиций перезаписываются.
+        :param max_workers: Количество потоков записи. По умолчанию определяется автоматически.
+        :return: Список путей к записанным файлам.
+        :raises ValueError: Если формат или сжатие не поддерживаются, не задана станция
+            или в колонке 'time' есть пропуски.
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        if compression == 'default':
+            compression = {'parquet': 'snappy', 'feather': 'lz4', 'csv': None}[fmt]
+        if compression not in EXPORT_COMPRESSIONS[fmt]:
+            raise ValueError(f"Unsupported {fmt} compression: {compression}")
+        if fmt == 'feather' and compression is None:
+            compression = 'uncompressed'
+
+        frame = self.df.copy()
+        if 'station_id' in frame.columns:
+            stations = frame.pop('station_id')
+        elif station_id is not None:
+            stations = pd.Series(station_id, index=frame.index)
+        else:
+            raise ValueError("station_id is required when the DataFrame has no 'station_id' column.")
+        frame['time'] = pd.to_datetime(frame['time'])
+        if frame['time'].isna().any():
+            raise ValueError("Column 'time' contains missing values, rows cannot be partitioned by year.")
+        years = frame['time'].dt.year
+
+        partitions = [
+            (group, os.path.join(directory, f'station_id={station}', f'year={year}'))
+            for (station, year), group in frame.groupby([stations, years], sort=True)
+        ]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(write_partition, group, path, fmt, compression, chunksize, append)
+                for group, path in partitions
+            ]
+            return [future.result() for future in futures]
+
+    @time_execution
+    def save_to_excel(self, filename: str = 'weather_analysis.xlsx', directory: str = 'results'):
         """
         Сохраняет текущий DataFrame в Excel файл.
+        Подходит для небольших результатов, для больших объемов используйте export.
 
         :param filename: Имя файла для сохранения. По умолчанию 'weather_analysis.xlsx'.
+        :param directory: Каталог для сохранения. По умолчанию 'results'.
         """
-        self.df.to_excel('results/' + filename, index=False)
+        if len(self.df) >= EXCEL_MAX_ROWS:
+            raise ValueError(f"DataFrame has {len(self.df)} rows, which exceeds the Excel sheet limit; use export instead.")
+        self.df.to_excel(os.path.join(directory, filename), index=False)
 
     def close_database(self):
         """